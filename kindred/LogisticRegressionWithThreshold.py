@@ -1,35 +1,42 @@
 
 import numpy as np
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import GridSearchCV
+from scipy.sparse import issparse
+from sklearn.linear_model import LogisticRegressionCV
 
+def _toCSR(X):
+	# The solver works on rows so convert other sparse formats (e.g. CSC or COO) up front
+	if issparse(X) and X.format != 'csr':
+		return X.tocsr()
+	return X
 
 class LogisticRegressionWithThreshold:
 	"""
 	A modified Logistic Regression classifier that will filter calls by a custom threshold, instead of the default 0.5. This allows for control of the precision-recall tradeoff, e.g. false positives versus false negatives.
+
+	It is intended for binary classes (as used by :class:`kindred.MultiLabelClassifier`). With more than two classes, a separate regularization strength is chosen for each class's one-vs-rest problem rather than a single one for all classes.
 	
-	:ivar clf: The underlying LogisticRegression classifier
+	:ivar clf: The underlying cross-validated LogisticRegression classifier
 	:ivar threshold: Threshold to use, should be between 0 and 1
 	"""
 
-	def __init__(self,threshold=0.5):
+	def __init__(self,threshold=0.5,n_jobs=-1):
 		"""
 		Set up a Logistic Regression classifier that can use a different threshold for predictions and thereby be more lenient (lower threshold, false positives increase, false negatives decrease) or more conservative (higher threshold, false positives decrease, false negative increase).
 		
 		:param threshold: Threshold to use, should be between 0 and 1
+		:param n_jobs: Number of parallel jobs to use for the cross-validation folds (-1 uses all processors)
 		:type threshold: float
+		:type n_jobs: int
 		"""
 		
 		assert threshold >= 0 and threshold <= 1, "Threshold must be between 0 and 1"
 
-		model_params = {
-			"C": [0.00390625, 0.5, 4],
-		}
+		# Kept in ascending order so that each fit along the regularization path can warm-start from the previous one
+		Cs = [0.00390625, 0.5, 4]
 
-		clf = LogisticRegression(
-			class_weight=None, random_state=1, solver='liblinear', multi_class='ovr', tol=1e-3
+		self.clf = LogisticRegressionCV(
+			Cs=Cs, cv=3, scoring="f1_micro", class_weight=None, random_state=1, solver='saga', multi_class='ovr', tol=1e-3, max_iter=200, n_jobs=n_jobs
 		)
-		self.clf = GridSearchCV(clf, model_params, cv=3, scoring="f1_micro")
 		self.threshold = threshold
 
 	def fit(self,X,Y):
@@ -42,6 +49,7 @@ class LogisticRegressionWithThreshold:
 		:type Y: matrix
 		"""
 
+		X = _toCSR(X)
 		self.clf.fit(X,Y)
 		self.classes_ = self.clf.classes_
 
@@ -55,17 +63,16 @@ class LogisticRegressionWithThreshold:
 		:rtype: matrix
 		"""
 
-		# probs = self.clf.predict_proba(X)
-		probs = self.clf.best_estimator_.predict_proba(X)
-
-		# Ignore probabilities that fall below our threshold
-		probs[probs<self.threshold] = -1.0
-
-		# Make sure that the zero class is only select if all other options are below the threshold
-		probs[:,0] = -0.5
+		probs = self.clf.predict_proba(_toCSR(X))
 
-		# And get the highest probability for each row
-		predictions = np.argmax(probs,axis=1)
+		if probs.shape[1] == 2:
+			# With a single non-zero class, it just needs to meet the threshold
+			predictions = (probs[:,1] >= self.threshold).astype(np.intp)
+		else:
+			# Get the most likely of the non-zero classes for each row, and only use it if it meets our threshold
+			top = probs[:,1:].argmax(axis=1) + 1
+			topProbs = probs[np.arange(probs.shape[0]),top]
+			predictions = np.where(topProbs >= self.threshold, top, 0)
 
 		return predictions
 
@@ -80,4 +87,4 @@ class LogisticRegressionWithThreshold:
 		:rtype: matrix
 		"""
 
-		return self.clf.best_estimator_.predict_proba(X)
+		return self.clf.predict_proba(_toCSR(X))
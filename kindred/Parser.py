@@ -2,9 +2,45 @@
 
 
 import kindred
-from intervaltree import IntervalTree
+import numpy as np
 from collections import defaultdict
-import six
+import sys
+import threading
+
+def _mapEntitiesToTokens(tokens,spans):
+	"""
+	Find which tokens overlap with each entity span by sweeping through both in order of position.
+
+	:param tokens: Tokens ordered by position
+	:param spans: Tuples of (start,end,entityID). Duplicates are only counted once
+	:type tokens: list of kindred.Token
+	:type spans: list of tuples
+	:return: Dictionary from entity ID to the indices of the tokens that it overlaps
+	:rtype: dict
+	"""
+
+	# Sorted by start position so that they can be swept alongside the (already ordered) tokens
+	spans = sorted(set(spans))
+
+	entityIDsToTokenLocs = defaultdict(list)
+	spanCount = len(spans)
+	active = []
+	j = 0
+	for i,t in enumerate(tokens):
+		tokenStart,tokenEnd = t.startPos,t.endPos
+
+		# Add any spans that start before the end of this token
+		while j < spanCount and spans[j][0] < tokenEnd:
+			active.append(spans[j])
+			j += 1
+
+		# Drop spans that finished before this token (later tokens start further on so they can't match either)
+		active = [ span for span in active if span[1] > tokenStart ]
+
+		for a,b,entityID in active:
+			entityIDsToTokenLocs[entityID].append(i)
+
+	return entityIDsToTokenLocs
 
 class Parser:
 	"""
@@ -12,39 +48,68 @@ class Parser:
 	
 	:ivar model: Model for parsing (e.g. en/de/es/pt/fr/it/nl)
 	:ivar nlp: The underlying Spacy language model to use for parsing
+	:ivar batch_size: Number of documents to pass through Spacy at a time
+	:ivar n_process: Number of processes for Spacy to use
 	"""
 
 	_models = {}
+	_modelsLock = threading.Lock()
+	_modelLocks = defaultdict(threading.Lock)
 	
-	def __init__(self,model='en_core_web_sm'):
+	def __init__(self,model='en_core_web_sm',batch_size=50,n_process=1):
 		"""
 		Create a Parser object that will use Spacy for parsing. It offers all the same languages that Spacy offers. Check out: https://spacy.io/usage/models. Note that the language model needs to be downloaded first (e.g. python -m spacy download en)
 		
 		:param model: Name of an available Spacy language model for parsing (e.g. en/de/es/pt/fr/it/nl)
+		:param batch_size: Number of documents to pass through Spacy at a time
+		:param n_process: Number of processes for Spacy to use. Multiple processes are often slower for small corpora
 		:type model: str
+		:type batch_size: int
+		:type n_process: int
 		"""
 
+		self.model = model
+		self.batch_size = batch_size
+		self.n_process = n_process
+
+		self.nlp = Parser._loadModel(model)
+
+		self._posCache = {}
+		self._depCache = {}
+
+	@staticmethod
+	def _loadModel(model):
 		# We only load spacy if a Parser is created (to allow ReadTheDocs to build the documentation easily)
 		import spacy
 
-		self.model = model
+		disabled = ['ner']
+		key = (model,frozenset(disabled))
 
-		if not model in Parser._models:
-			Parser._models[model] = spacy.load(model, disable=['ner'])
+		# Each model has its own lock so that a preload in another thread isn't duplicated, without blocking loads of other models
+		with Parser._modelsLock:
+			keyLock = Parser._modelLocks[key]
 
-		self.nlp = Parser._models[model]
+		with keyLock:
+			if not key in Parser._models:
+				Parser._models[key] = spacy.load(model, disable=disabled)
 
-	def _sentencesGenerator(self,text):
-		if six.PY2 and isinstance(text,str):
-			text = unicode(text)
+			return Parser._models[key]
 
-		parsed = self.nlp(text)
-
-		# Return the entire document as one "sentence" since we assume sentence splitting has already been performed.
-		return [parsed]
+	@staticmethod
+	def preload(model='en_core_web_sm'):
+		"""
+		Start loading a Spacy language model in a background thread so that it is ready (or partly loaded) by the time a Parser is created. This lets the loading overlap with other work such as loading a corpus.
+		
+		:param model: Name of an available Spacy language model for parsing (e.g. en/de/es/pt/fr/it/nl)
+		:type model: str
+		:return: The thread that is loading the model
+		:rtype: threading.Thread
+		"""
 
-		# for sent in parsed.sents:
-		# 	yield sent
+		thread = threading.Thread(target=Parser._loadModel, args=(model,))
+		thread.daemon = True
+		thread.start()
+		return thread
 
 	def parse(self,corpus):
 		"""
@@ -56,55 +121,66 @@ class Parser:
 
 		assert isinstance(corpus,kindred.Corpus)
 
-		# Ignore DeprecationWarning from SortedDict which is inside IntervalTree
-		import warnings
-		warnings.filterwarnings("ignore", category=DeprecationWarning)
+		from spacy.attrs import LEMMA,POS,IDX,HEAD,DEP
 
-		for d in corpus.documents:
-			entityIDsToEntities = { entity.entityID:entity for entity in d.entities }
-		
-			denotationTree = IntervalTree()
-			entityTypeLookup = {}
+		# Local references for use inside the per-token loops
+		Token = kindred.Token
+		strings = self.nlp.vocab.strings
+
+		# The part-of-speech and dependency tags come from a small set so share a single copy of each string
+		posCache = self._posCache
+		depCache = self._depCache
+
+		parsedDocs = self.nlp.pipe((d.text for d in corpus.documents), batch_size=self.batch_size, n_process=self.n_process)
+
+		for d,parsed in zip(corpus.documents,parsedDocs):
+			entityIDsToEntities = {}
+			spans = []
 			for e in d.entities:
-				entityTypeLookup[e.entityID] = e.entityType
-			
+				entityIDsToEntities[e.entityID] = e
 				for a,b in e.position:
 					if b > a:
-						denotationTree[a:b] = e.entityID
-				
-			for sentence in self._sentencesGenerator(d.text):
-				tokens = []
-				for t in sentence:
-					token = kindred.Token(t.text,t.lemma_,t.pos_,t.idx,t.idx+len(t.text))
-					tokens.append(token)
-
-				sentenceStart = tokens[0].startPos
-				sentenceEnd = tokens[-1].endPos
-				sentenceTxt = d.text[sentenceStart:sentenceEnd]
-
-				indexOffset = sentence[0].i
-				dependencies = []
-				for t in sentence:
-					depName = t.dep_
-					dep = (t.head.i-indexOffset,t.i-indexOffset,depName)
-					dependencies.append(dep)
-
-				entityIDsToTokenLocs = defaultdict(list)
-				for i,t in enumerate(tokens):
-					entitiesOverlappingWithToken = denotationTree[t.startPos:t.endPos]
-					for interval in entitiesOverlappingWithToken:
-						entityID = interval.data
-						entityIDsToTokenLocs[entityID].append(i)
-
-				sentence = kindred.Sentence(sentenceTxt, tokens, dependencies, d.sourceFilename)
+						spans.append((a,b,e.entityID))
+
+			# Pull the token attributes out in bulk instead of going through each spaCy token
+			words = [ t.text for t in parsed ]
+			attributes = parsed.to_array([LEMMA,POS,IDX,HEAD,DEP])
+			lemmas,poses,starts,deps = attributes[:,[0,1,2,4]].T.tolist()
+			# Heads are relative offsets (which can be negative) so must be read as signed
+			heads = attributes[:,3].astype(np.int64).tolist()
+
+			for pos in set(poses):
+				if not pos in posCache:
+					posCache[pos] = sys.intern(strings[pos])
+
+			tokens = [ Token(word,strings[lemma],posCache[pos],start,start+len(word)) for word,lemma,pos,start in zip(words,lemmas,poses,starts) ]
+
+			# Use the entire document as one "sentence" since we assume sentence splitting has already been performed.
+			sentenceStart = tokens[0].startPos
+			sentenceEnd = tokens[-1].endPos
+			sentenceTxt = d.text[sentenceStart:sentenceEnd]
+
+			for dep in set(deps):
+				if not dep in depCache:
+					depCache[dep] = sys.intern(strings[dep])
+
+			dependencies = [ (i+head,i,depCache[dep]) for i,(head,dep) in enumerate(zip(heads,deps)) ]
+
+			# Skip the sweep for documents without entities (e.g. when making predictions on raw text)
+			if spans:
+				entityIDsToTokenLocs = _mapEntitiesToTokens(tokens,spans)
+			else:
+				entityIDsToTokenLocs = {}
+
+			sentence = kindred.Sentence(sentenceTxt, tokens, dependencies, d.sourceFilename)
+			
+			# Let's gather up the information about the "known" entities in the sentence (in order of their first token)
+			for entityID,entityLocs in entityIDsToTokenLocs.items():
+				# Get the entity associated with this ID
+				e = entityIDsToEntities[entityID]
+				sentence.addEntityAnnotation(e,entityLocs)
 				
-				# Let's gather up the information about the "known" entities in the sentence
-				for entityID,entityLocs in sorted(entityIDsToTokenLocs.items()):
-					# Get the entity associated with this ID
-					e = entityIDsToEntities[entityID]
-					sentence.addEntityAnnotation(e,entityLocs)
-					
-				d.addSentence(sentence)
+			d.addSentence(sentence)
 
 		corpus.parsed = True
 
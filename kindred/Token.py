@@ -9,6 +9,9 @@ class Token:
 	:ivar startPos: Start position of token in document text (note: not the sentence text)
 	:ivar endPos: End position of token in document text (note: not the sentence text)
 	"""
+
+	# Documents can have many tokens so avoid a per-instance dictionary
+	__slots__ = ('word','lemma','partofspeech','startPos','endPos')
 	
 	def __init__(self,word,lemma,partofspeech,startPos,endPos):
 		"""
@@ -32,6 +35,19 @@ class Token:
 		self.startPos = startPos
 		self.endPos = endPos
 
+	def __getstate__(self):
+		return { name:getattr(self,name) for name in Token.__slots__ }
+
+	def __setstate__(self,state):
+		# Tokens pickled before __slots__ was added store their state as a plain dictionary, otherwise it may be a (dict,slots) tuple
+		if isinstance(state,tuple):
+			dictState,slotsState = state
+			state = dict(dictState or {})
+			state.update(slotsState or {})
+
+		for name,value in state.items():
+			setattr(self,name,value)
+
 	def __str__(self):
 		return self.word
 		
@@ -0,0 +1,56 @@
+import kindred
+import numpy as np
+
+def _thresholdedArgmax(probs,threshold):
+	probs = probs.copy()
+	probs[probs<threshold] = -1.0
+	probs[:,0] = -0.5
+	return np.argmax(probs,axis=1)
+
+def _generateData(classCount):
+	np.random.seed(1)
+
+	N = 300
+	X = np.random.rand(N,3)
+	Y = np.array([ min(int(X[i,0] * classCount), classCount-1) for i in range(N) ])
+
+	return X,Y
+
+def test_logisticregressionwiththreshold_binary():
+	X,Y = _generateData(2)
+
+	for threshold in [0.0,0.1,0.5,0.9,1.0]:
+		clf = kindred.LogisticRegressionWithThreshold(threshold=threshold)
+		clf.fit(X,Y)
+
+		probs = clf.predict_proba(X)
+		predicted = clf.predict(X)
+
+		assert probs.shape == (X.shape[0],2)
+		assert predicted.tolist() == _thresholdedArgmax(probs,threshold).tolist()
+
+def test_logisticregressionwiththreshold_multiclass():
+	X,Y = _generateData(4)
+
+	for threshold in [0.0,0.1,0.3,0.5,0.9]:
+		clf = kindred.LogisticRegressionWithThreshold(threshold=threshold)
+		clf.fit(X,Y)
+
+		probs = clf.predict_proba(X)
+		predicted = clf.predict(X)
+
+		assert probs.shape == (X.shape[0],4)
+		assert predicted.tolist() == _thresholdedArgmax(probs,threshold).tolist()
+
+def test_logisticregressionwiththreshold_sparseFormats():
+	from scipy.sparse import csr_matrix
+
+	X,Y = _generateData(2)
+	Xcsr = csr_matrix(X)
+
+	clf = kindred.LogisticRegressionWithThreshold(threshold=0.5)
+	clf.fit(Xcsr.tocsc(),Y)
+
+	expected = clf.predict(Xcsr).tolist()
+	assert clf.predict(Xcsr.tocsc()).tolist() == expected
+	assert clf.predict(Xcsr.tocoo()).tolist() == expected
@@ -185,6 +185,65 @@ def test_notunicode():
 	assert isinstance(doc.sentences,list)
 	assert len(doc.sentences) == 1
 
+def test_multipleDocumentsInBatches():
+	texts = [ '<drug id="1">Erlotinib</drug> is a common treatment for <cancer id="2">lung</cancer> cancer', 'You need to turn in your homework by next week', '<drug id="3">Aspirin</drug> treats <disease id="4">headaches</disease>' ]
+	corpus = kindred.Corpus()
+	for text in texts:
+		corpus.addDocument(kindred.Document(text,loadFromSimpleTag=True))
+	
+	parser = kindred.Parser(batch_size=2)
+	parser.parse(corpus)
+	
+	assert len(corpus.documents) == 3
+	for doc in corpus.documents:
+		assert len(doc.sentences) == 1
+		assert str(doc.sentences[0]) == " ".join(doc.text.split())
+
+	assert [ w.word for w in corpus.documents[2].sentences[0].tokens ] == ['Aspirin','treats','headaches']
+	assertEntityWithLocation(corpus.documents[0].sentences[0].entityAnnotations[0],'drug',[0],'1')
+	assertEntityWithLocation(corpus.documents[2].sentences[0].entityAnnotations[1],'disease',[2],'4')
+
+def test_mapEntitiesToTokens():
+	from kindred.Parser import _mapEntitiesToTokens
+
+	# Tokens for "Erlotinib is a treatment for lung cancer"
+	words = "Erlotinib is a treatment for lung cancer".split()
+	tokens = []
+	pos = 0
+	for w in words:
+		tokens.append(kindred.Token(w,w,None,pos,pos+len(w)))
+		pos += len(w) + 1
+
+	# Spans: the drug, a discontinuous entity and one that starts partway through a token
+	spans = sorted([ (0,9,1), (29,33,2), (34,40,2), (31,40,3) ])
+
+	entityIDsToTokenLocs = _mapEntitiesToTokens(tokens,spans)
+	assert dict(entityIDsToTokenLocs) == {1:[0], 2:[5,6], 3:[5,6]}
+
+	assert dict(_mapEntitiesToTokens(tokens,[])) == {}
+
+	# An entity that lists the same position twice should only get each token once
+	duplicatedSpans = [ (15,28,4), (0,9,1), (15,28,4) ]
+	assert dict(_mapEntitiesToTokens(tokens,duplicatedSpans)) == {1:[0], 4:[3,4]}
+
+def test_preload():
+	key = ('en_core_web_sm',frozenset(['ner']))
+
+	# Clear out any model loaded by earlier tests so that the preload has to do the loading (and put it back afterwards for later tests)
+	existing = kindred.Parser._models.pop(key,None)
+	try:
+		thread = kindred.Parser.preload()
+		thread.join()
+
+		assert key in kindred.Parser._models
+		preloaded = kindred.Parser._models[key]
+
+		parser = kindred.Parser()
+		assert parser.nlp is preloaded
+	finally:
+		if existing is not None:
+			kindred.Parser._models[key] = existing
+
 if __name__ == '__main__':
 	#test_largeSentence()
 	test_parsing_dependencyGraph()
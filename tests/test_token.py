@@ -9,3 +9,19 @@ def test_token_repr():
 	t = kindred.Token(word="hat",lemma="hat",partofspeech="NN",startPos=0,endPos=3)
 
 	assert t.__repr__()  == "hat"
+
+def test_token_pickle():
+	import pickle
+	t = kindred.Token(word="hat",lemma="hat",partofspeech="NN",startPos=0,endPos=3)
+
+	unpickled = pickle.loads(pickle.dumps(t))
+	assert (unpickled.word,unpickled.lemma,unpickled.partofspeech,unpickled.startPos,unpickled.endPos) == ("hat","hat","NN",0,3)
+
+def test_token_unpickleOldFormat():
+	import pickle
+	# A Token pickled by versions of kindred before Token used __slots__ (with its state stored as a dictionary)
+	oldPickle = b'\x80\x02ckindred.Token\nToken\nq\x00)\x81q\x01}q\x02(X\x04\x00\x00\x00wordq\x03X\x03\x00\x00\x00hatq\x04X\x05\x00\x00\x00lemmaq\x05h\x04X\x0c\x00\x00\x00partofspeechq\x06X\x02\x00\x00\x00NNq\x07X\x08\x00\x00\x00startPosq\x08K\x00X\x06\x00\x00\x00endPosq\tK\x03ub.'
+
+	unpickled = pickle.loads(oldPickle)
+	assert isinstance(unpickled,kindred.Token)
+	assert (unpickled.word,unpickled.lemma,unpickled.partofspeech,unpickled.startPos,unpickled.endPos) == ("hat","hat","NN",0,3)